@@ -14,7 +14,13 @@
 ### along with this program; if not, write to the Free Software
 ### Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA
 
+import multiprocessing
+
 from mcmmtk_pkg import Gtk, main_window
 
-main_window.MainWindow()
-Gtk.main()
+# The guard stops "spawn"ed cross reference worker processes (which
+# re-import this script) from starting their own main window.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    main_window.MainWindow()
+    Gtk.main()
@@ -35,6 +35,7 @@ from .epaint import standards
 from . import APP_NAME
 
 from . import mpaint
+from . import xref
 
 APP_ICON_PIXBUF = GdkPixbuf.Pixbuf.new_from_file(icons.APP_ICON_FILE)
 
@@ -135,6 +136,7 @@ class MainWindow(dialogue.MainWindow, actions.CAGandUIManager):
             </menu>
             <menu action="mcmmtk_standards_manager_menu">
                 <menuitem action="mixer_load_paint_standard"/>
+                <menuitem action="mixer_xref_paint_standards"/>
             </menu>
             <menu action="mcmmtk_samples_menu">
               <menuitem action="take_screen_sample"/>
@@ -197,11 +199,17 @@ class MainWindow(dialogue.MainWindow, actions.CAGandUIManager):
                  _("Load a paint standard from a file."),
                  lambda _action: self.paint_standards_manager.add_paint_standard()
                 ),
+                ("mixer_xref_paint_standards", None, _("Cross Reference"), None,
+                 _("Cross reference paint standard files against paint series files."),
+                 lambda _action: self._xref_paint_standards_acb()
+                ),
                 ("mcmmtk_main_window_quit", Gtk.STOCK_QUIT, _("Quit"), None,
                  _("Close the application."),
                  lambda _action: self.quit()
                 ),
             ])
+    def _xref_paint_standards_acb(self):
+        xref.XRefDialogue(parent=self)
     def _configure_event_cb(self, widget, event):
         recollect.set("mcmmtk_main_window", "last_geometry", "{0.width}x{0.height}+{0.x}+{0.y}".format(event))
     def quit(self):
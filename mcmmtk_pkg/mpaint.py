@@ -32,6 +32,8 @@ from .epaint import pseries
 from .epaint import standards
 from .epaint import vpaint
 
+from . import pfile
+
 class ModelPaint(vpaint.Paint):
     COLOUR = vpaint.HCV
     class CHARACTERISTICS(pchar.Characteristics):
@@ -88,9 +90,26 @@ class MatchedModelPaintListView(pmix.MatchedPaintListView):
     MODEL = MatchedModelPaintListStore
     MIXED_PAINT_INFORMATION_DIALOGUE = MixedModelPaintInformationDialogue
 
+class DefinitionFileMixin:
+    """Stream the collection's definition to/from file with the header
+    keys given by HEADER_KEYS.
+    """
+    HEADER_KEYS = ()
+    @classmethod
+    def read_definition_file(cls, file_path):
+        try:
+            header_values, lines = pfile.read_definition(file_path, cls.HEADER_KEYS)
+        except ValueError as edata:
+            raise cls.ParseError(str(edata))
+        return header_values, cls.paints_fm_definition(lines)
+    @classmethod
+    def write_definition_file(cls, file_path, header_values, paints):
+        pfile.atomic_write(file_path, pfile.definition_lines(cls.HEADER_KEYS, header_values, paints))
+
 MODEL_NC_MATCHER = re.compile(r'^NamedColour\(name=(".+"), rgb=(.+), transparency="(.+)", finish="(.+)"\)$')
 
-class ModelPaintSeries(pseries.PaintSeries):
+class ModelPaintSeries(DefinitionFileMixin, pseries.PaintSeries):
+    HEADER_KEYS = pfile.SERIES_HEADER_KEYS
     @staticmethod
     def paints_fm_definition(lines):
         from .epaint.rgbh import RGB8, RGB16, RGBPN
@@ -165,8 +184,9 @@ class ModelPaintSeriesManager(pseries.PaintSeriesManager):
     PAINT_SELECTOR = ModelPaintSelector
     PAINT_COLLECTION = ModelPaintSeries
 
-class ModelPaintStandard(standards.PaintStandard):
+class ModelPaintStandard(DefinitionFileMixin, standards.PaintStandard):
     PAINT = ModelPaint
+    HEADER_KEYS = pfile.STANDARD_HEADER_KEYS
     @classmethod
     def paints_fm_definition(cls, lines):
         # this has to be defined here to SEE ModelPaint in eval()
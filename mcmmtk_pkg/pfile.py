@@ -0,0 +1,129 @@
+#  Copyright 2026 The mcmmtk contributors
+#
+# This software is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License only.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; if not, write to:
+#  The Free Software Foundation, Inc., 51 Franklin Street,
+#  Fifth Floor, Boston, MA 02110-1301 USA
+
+"""Streaming reading and atomic writing of paint series and standard files"""
+
+__all__ = []
+
+import os
+import secrets
+import stat
+
+BUFFER_SIZE = 1 << 16
+
+# A definition file is one "Key: value" line per header key followed by
+# one line per paint in the form that paints_fm_definition() evaluates.
+SERIES_HEADER_KEYS = ("Manufacturer", "Series")
+STANDARD_HEADER_KEYS = ("Sponsor", "Standard")
+
+def definition_lines(header_keys, header_values, paints):
+    """Generate the (newline terminated) lines of the definition of a
+    paint collection with the given header values and paints one at a
+    time so that the definition never has to be held in memory in full.
+    """
+    for key, value in zip(header_keys, header_values):
+        if "\n" in value:
+            raise ValueError(_("Header value contains a newline: {0}.").format(repr(value)))
+        yield "{0}: {1}\n".format(key, value)
+    for paint in paints:
+        yield repr(paint) + "\n"
+
+def read_definition(file_path, header_keys):
+    """Return the header values and the paint definition lines of the
+    paint collection definition in file_path.
+    """
+    with open(file_path, "r", encoding="utf-8") as fobj:
+        lines = fobj.read().splitlines()
+    if len(lines) < len(header_keys):
+        raise ValueError(_("{0}: missing header.").format(file_path))
+    header_values = []
+    for key, line in zip(header_keys, lines):
+        tag = key + ": "
+        if not line.startswith(tag):
+            raise ValueError(_("{0}: expected \"{1}\" header: {2}.").format(file_path, tag, line))
+        header_values.append(line[len(tag):])
+    return header_values, lines[len(header_keys):]
+
+def _fsync_dir(dir_path):
+    # Make the rename itself durable (not possible on all platforms)
+    try:
+        fd = os.open(dir_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def _create_temp_file(file_path):
+    # Unlike mkstemp() (which always uses mode 0o600) this lets the
+    # kernel apply the process's umask to the new file's mode.
+    prefix = os.path.join(os.path.dirname(file_path), "." + os.path.basename(file_path) + ".")
+    while True:
+        temp_path = prefix + secrets.token_hex(4) + ".tmp"
+        try:
+            return os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o666), temp_path
+        except FileExistsError:
+            continue
+
+def _copy_ownership(file_path, old_stat):
+    # Only the super user can give a file away so settle for the group
+    # (or nothing) if that's all that is allowed.
+    if not hasattr(os, "chown"):
+        return
+    for uid in (old_stat.st_uid, -1):
+        try:
+            os.chown(file_path, uid, old_stat.st_gid)
+            return
+        except PermissionError:
+            pass
+
+def atomic_write(file_path, chunks, encoding="utf-8"):
+    """Write the (str) chunks to file_path via a buffered temporary file
+    in the same directory that is fsync()ed and then renamed over
+    file_path so that a failure part way through (including an exception
+    raised by the chunks iterator) leaves any existing file intact.
+    Symbolic links are followed (so that the link is not replaced) and
+    the permissions and (where possible) ownership of an existing file
+    are preserved.
+    """
+    file_path = os.path.realpath(file_path)
+    dir_path = os.path.dirname(file_path)
+    try:
+        old_stat = os.stat(file_path)
+    except FileNotFoundError:
+        old_stat = None
+    fd, temp_path = _create_temp_file(file_path)
+    try:
+        with os.fdopen(fd, "wb", buffering=BUFFER_SIZE) as fobj:
+            for chunk in chunks:
+                fobj.write(chunk.encode(encoding))
+            fobj.flush()
+            os.fsync(fobj.fileno())
+        if old_stat is not None:
+            # chown() may clear set-id bits so do it before chmod()
+            _copy_ownership(temp_path, old_stat)
+            os.chmod(temp_path, stat.S_IMODE(old_stat.st_mode))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(dir_path)
@@ -0,0 +1,421 @@
+#  Copyright 2026 The mcmmtk contributors
+#
+# This software is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License only.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; if not, write to:
+#  The Free Software Foundation, Inc., 51 Franklin Street,
+#  Fifth Floor, Boston, MA 02110-1301 USA
+
+"""Cross reference paint standard files against paint series files"""
+
+__all__ = []
+
+import ast
+import collections
+import csv
+import heapq
+import itertools
+import multiprocessing
+import os
+import re
+import threading
+
+from gi.repository import GLib
+from gi.repository import Gtk
+
+from .gtx import actions
+from .gtx import recollect
+
+from . import pfile
+
+# Colour differences are CIE76 delta E values calculated in CIELAB
+# space (D65 white) from each paint's (16 bits per channel) sRGB value.
+_D65_WHITE = (0.95047, 1.0, 1.08883)
+
+def _linear(channel):
+    value = channel / 0xFFFF
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+def _lab_f(t):
+    if t > 216.0 / 24389.0:
+        return t ** (1.0 / 3.0)
+    return (24389.0 / 27.0 * t + 16.0) / 116.0
+
+def rgb16_to_lab(rgb):
+    """Return the CIELAB coordinates of the given RGB16 value"""
+    red, green, blue = (_linear(channel) for channel in rgb)
+    x = 0.4124564 * red + 0.3575761 * green + 0.1804375 * blue
+    y = 0.2126729 * red + 0.7151522 * green + 0.0721750 * blue
+    z = 0.0193339 * red + 0.1191920 * green + 0.9503041 * blue
+    fx, fy, fz = (_lab_f(v / w) for v, w in zip((x, y, z), _D65_WHITE))
+    return (116.0 * fy - 16.0, 500.0 * (fx - fy), 200.0 * (fy - fz))
+
+# Only the name and RGB of each paint are needed for the cross reference
+# so they are extracted from the definition lines without evaluating them
+PAINT_NAME_RGB_MATCHER = re.compile(r'^\w+\(name=("(?:[^"\\]|\\.)*"), rgb=RGB16\(red=(0x[0-9A-Fa-f]+), green=(0x[0-9A-Fa-f]+), blue=(0x[0-9A-Fa-f]+)\)')
+
+def read_collection(file_path, header_keys):
+    """Return the label and the (collection label, paint name, RGB16 value)
+    items for the paint collection defined in file_path.
+    """
+    header_values, lines = pfile.read_definition(file_path, header_keys)
+    label = " ".join(header_values)
+    items = []
+    for line in lines:
+        if not line.strip():
+            continue
+        match = PAINT_NAME_RGB_MATCHER.match(line)
+        if not match:
+            raise ValueError(_("{0}: badly formed definition: {1}.").format(file_path, line))
+        items.append((label, ast.literal_eval(match.group(1)), tuple(int(channel, 16) for channel in match.group(2, 3, 4))))
+    return label, items
+
+XRefEntry = collections.namedtuple("XRefEntry", ["standard", "standard_paint", "rank", "series", "series_paint", "delta_e"])
+
+# Worker processes are always "spawn"ed (even where "fork" is the
+# default) so that they don't inherit the GUI's state and threads.
+_MP_CONTEXT = multiprocessing.get_context("spawn")
+
+# The series' LAB values are sent to each worker process once (via the
+# pool initializer) rather than with every chunk of standard paints.
+_worker_series_labs = None
+
+def _init_worker(series_labs):
+    global _worker_series_labs
+    _worker_series_labs = series_labs
+
+def _top_k_for_chunk(args):
+    """Return the indices and delta E of the "k" nearest series paints
+    for each of the standard paint LAB values in the chunk.
+    """
+    chunk, k = args
+    series_labs = _worker_series_labs
+    result = []
+    for l1, a1, b1 in chunk:
+        # Squared distances preserve order so defer the sqrt() until
+        # only the "k" survivors are left
+        nearest = heapq.nsmallest(k, ((((l1 - l2) ** 2 + (a1 - a2) ** 2 + (b1 - b2) ** 2), index) for index, (l2, a2, b2) in enumerate(series_labs)))
+        result.append([(dsq ** 0.5, index) for dsq, index in nearest])
+    return result
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _default_chunk_size(n_standard_paints, processes):
+    # Several chunks per process keeps all cores busy as chunks finish
+    # at different times without making chunks too small to be worth
+    # the inter process overhead.
+    return max(1, min(256, -(-n_standard_paints // (processes * 4))))
+
+def _pool_chunk_results(pool, chunks, k, max_in_flight):
+    # Keep at most max_in_flight chunks queued or finished but not yet
+    # consumed (Pool.imap() would queue every chunk immediately).
+    pending = collections.deque()
+    for chunk in itertools.islice(chunks, max_in_flight):
+        pending.append(pool.apply_async(_top_k_for_chunk, ((chunk, k),)))
+    while pending:
+        result = pending.popleft().get()
+        for chunk in itertools.islice(chunks, 1):
+            pending.append(pool.apply_async(_top_k_for_chunk, ((chunk, k),)))
+        yield result
+
+def cross_reference(standard_items, series_items, k=5, chunk_size=None, processes=None):
+    """Generate XRefEntry tuples matching each standard paint with its
+    "k" closest series paints (in ascending delta E order).
+    standard_items and series_items are sequences of (collection label,
+    paint name, RGB16 value) tuples as returned by read_collection().  The standard paints are processed in chunks of "chunk_size"
+    (by default sized to give each process several chunks) and no more
+    than two chunks per process are in flight at any time.  Only the "k"
+    best matches for each standard paint are kept so the full standard x
+    series difference matrix is never built.  If "processes" is None all
+    available CPUs are used and if it is 1 the work is done in this process.
+    """
+    series_items = list(series_items)
+    if not series_items or k < 1:
+        return
+    series_labs = [rgb16_to_lab(rgb) for _colln, _name, rgb in series_items]
+    standard_items = list(standard_items)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = _default_chunk_size(len(standard_items), processes)
+    lab_chunks = ([rgb16_to_lab(rgb) for _colln, _name, rgb in chunk] for chunk in _chunks(standard_items, chunk_size))
+    if processes == 1:
+        _init_worker(series_labs)
+        chunk_results = map(_top_k_for_chunk, ((chunk, k) for chunk in lab_chunks))
+        pool = None
+    else:
+        pool = _MP_CONTEXT.Pool(processes, initializer=_init_worker, initargs=(series_labs,))
+        chunk_results = _pool_chunk_results(pool, lab_chunks, k, 2 * processes)
+    try:
+        rows = itertools.chain.from_iterable(chunk_results)
+        for (standard, standard_paint, _rgb), matches in zip(standard_items, rows):
+            for rank, (delta_e, index) in enumerate(matches, 1):
+                series, series_paint, _rgb = series_items[index]
+                yield XRefEntry(standard, standard_paint, rank, series, series_paint, delta_e)
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+CSV_HEADER = ["Standard", "Standard Colour", "Rank", "Series", "Paint", "Delta E"]
+
+def write_csv(file_path, entries):
+    """Write the cross reference entries to file_path as CSV"""
+    with open(file_path, "w", newline="", encoding="utf-8") as fobj:
+        writer = csv.writer(fobj)
+        writer.writerow(CSV_HEADER)
+        for entry in entries:
+            writer.writerow([entry.standard, entry.standard_paint, entry.rank, entry.series, entry.series_paint, "{0:.2f}".format(entry.delta_e)])
+
+class XRefListStore(Gtk.ListStore):
+    STANDARD, STANDARD_PAINT, RANK, SERIES, SERIES_PAINT, DELTA_E, ENTRY = range(7)
+    def __init__(self):
+        Gtk.ListStore.__init__(self, str, str, int, str, str, float, object)
+    def append_entry(self, entry):
+        self.append([entry.standard, entry.standard_paint, entry.rank, entry.series, entry.series_paint, entry.delta_e, entry])
+    def iter_entries(self):
+        return (row[self.ENTRY] for row in self)
+
+class XRefListView(Gtk.TreeView):
+    COLUMNS = [
+        (_("Standard"), XRefListStore.STANDARD),
+        (_("Standard Colour"), XRefListStore.STANDARD_PAINT),
+        (_("Rank"), XRefListStore.RANK),
+        (_("Series"), XRefListStore.SERIES),
+        (_("Paint"), XRefListStore.SERIES_PAINT),
+        (_("Delta E"), XRefListStore.DELTA_E),
+    ]
+    def __init__(self, model=None):
+        Gtk.TreeView.__init__(self, model=model if model is not None else XRefListStore())
+        for title, index in self.COLUMNS:
+            cell = Gtk.CellRendererText()
+            col = Gtk.TreeViewColumn(title, cell, text=index)
+            if index == XRefListStore.DELTA_E:
+                col.set_cell_data_func(cell, lambda _col, cell, model, tree_iter, _data: cell.set_property("text", "{0:.2f}".format(model[tree_iter][XRefListStore.DELTA_E])))
+            col.set_sort_column_id(index)
+            col.set_resizable(True)
+            self.append_column(col)
+    def sort_by_best_match(self):
+        self.get_model().set_sort_column_id(XRefListStore.DELTA_E, Gtk.SortType.ASCENDING)
+
+class XRefDialogue(Gtk.Dialog, actions.CAGandUIManager):
+    """Display (and export) the cross reference of the paints in the
+    paint standard files added by the user against the paints in the
+    paint series files added by the user.
+    The cross reference is calculated in a separate thread and its
+    entries are added to the list (in batches) as they become available.
+    """
+    UI_DESCR = """
+    <ui>
+        <toolbar name="xref_toolbar">
+            <toolitem action="xref_add_standard_file"/>
+            <toolitem action="xref_add_series_file"/>
+            <separator/>
+            <toolitem action="xref_calculate"/>
+            <toolitem action="xref_sort_by_best_match"/>
+            <toolitem action="xref_export_csv"/>
+        </toolbar>
+    </ui>
+    """
+    BATCH_SIZE = 500
+    recollect.define("xref", "last_export_file", recollect.Defn(str, ""))
+    recollect.define("xref", "last_collection_file", recollect.Defn(str, ""))
+    def __init__(self, k=5, parent=None):
+        Gtk.Dialog.__init__(self, title=_("Standards Cross Reference"), parent=parent, buttons=(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_CLOSE, Gtk.ResponseType.CLOSE))
+        actions.CAGandUIManager.__init__(self)
+        self._k = k
+        self._standard_labels = []
+        self._standard_items = []
+        self._series_labels = []
+        self._series_items = []
+        self._n_done = 0
+        self._cancelled = None
+        self._complete = False
+        self.get_content_area().pack_start(self.ui_manager.get_widget("/xref_toolbar"), expand=False, fill=True, padding=0)
+        self.sources_label = Gtk.Label()
+        self.sources_label.set_xalign(0.0)
+        self.sources_label.set_line_wrap(True)
+        self.get_content_area().pack_start(self.sources_label, expand=False, fill=True, padding=0)
+        self.list_view = XRefListView()
+        scrolled_window = Gtk.ScrolledWindow()
+        scrolled_window.set_size_request(640, 480)
+        scrolled_window.add(self.list_view)
+        self.get_content_area().pack_start(scrolled_window, expand=True, fill=True, padding=0)
+        self.progress_bar = Gtk.ProgressBar()
+        self.progress_bar.set_show_text(True)
+        self.get_content_area().pack_start(self.progress_bar, expand=False, fill=True, padding=0)
+        self.connect("response", self._response_cb)
+        self._update_sources()
+        self._update_state()
+        self.show_all()
+    @property
+    def _running(self):
+        return self._cancelled is not None and not self._cancelled.is_set()
+    def _update_sources(self):
+        self.sources_label.set_text(_("Standards: {0} ({1} colours)\nSeries: {2} ({3} paints)").format(
+            ", ".join(self._standard_labels) or _("none"), len(self._standard_items),
+            ", ".join(self._series_labels) or _("none"), len(self._series_items)))
+    def _update_state(self, text=None):
+        running = self._running
+        can_calculate = bool(self._standard_items and self._series_items)
+        for name in ["xref_add_standard_file", "xref_add_series_file"]:
+            self.action_groups.get_action(name).set_sensitive(not running)
+        self.action_groups.get_action("xref_calculate").set_sensitive(can_calculate and not running)
+        self.action_groups.get_action("xref_export_csv").set_sensitive(self._complete)
+        self.set_response_sensitive(Gtk.ResponseType.CANCEL, running)
+        n_standard_paints = len(self._standard_items)
+        if text is None:
+            if not can_calculate:
+                text = _("Add at least one paint standard file and one paint series file.")
+            else:
+                text = _("{0} of {1} standard colours").format(self._n_done, n_standard_paints)
+        self.progress_bar.set_fraction(self._n_done / n_standard_paints if n_standard_paints else 0.0)
+        self.progress_bar.set_text(text)
+    def _report_error(self, text):
+        msg = Gtk.MessageDialog(parent=self, flags=Gtk.DialogFlags.MODAL, type=Gtk.MessageType.ERROR, buttons=Gtk.ButtonsType.CLOSE, text=text)
+        msg.run()
+        msg.destroy()
+    def _ask_file_path(self, title, action, pattern=None):
+        buttons = (Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OK, Gtk.ResponseType.OK)
+        dlg = Gtk.FileChooserDialog(title=title, parent=self, action=action, buttons=buttons)
+        if pattern:
+            file_filter = Gtk.FileFilter()
+            file_filter.add_pattern(pattern)
+            dlg.set_filter(file_filter)
+        if action == Gtk.FileChooserAction.SAVE:
+            dlg.set_do_overwrite_confirmation(True)
+            last_file = recollect.get("xref", "last_export_file")
+        else:
+            last_file = recollect.get("xref", "last_collection_file")
+        if last_file:
+            dlg.set_filename(last_file)
+        file_path = dlg.get_filename() if dlg.run() == Gtk.ResponseType.OK else None
+        dlg.destroy()
+        return file_path
+    def _add_collection_file(self, title, pattern, header_keys, labels, items):
+        file_path = self._ask_file_path(title, Gtk.FileChooserAction.OPEN, pattern)
+        if not file_path:
+            return
+        try:
+            label, new_items = read_collection(file_path, header_keys)
+        except (OSError, UnicodeError, ValueError, SyntaxError) as edata:
+            self._report_error(str(edata))
+            return
+        recollect.set("xref", "last_collection_file", file_path)
+        if label in labels:
+            self._report_error(_("\"{0}\" has already been added.").format(label))
+            return
+        labels.append(label)
+        items.extend(new_items)
+        self._reset()
+        self._update_sources()
+        self._update_state()
+    def _reset(self):
+        self.list_view.get_model().clear()
+        self._n_done = 0
+        self._complete = False
+    def _start_calculation(self):
+        self._reset()
+        self._cancelled = threading.Event()
+        self._update_state()
+        thread = threading.Thread(target=self._calculate, args=(list(self._standard_items), list(self._series_items), self._k, self._cancelled), daemon=True)
+        thread.start()
+    def _calculate(self, standard_items, series_items, k, cancelled):
+        # NB: runs in its own thread so must only talk to GTK via idle_add()
+        entries = cross_reference(standard_items, series_items, k=k)
+        batch = []
+        try:
+            for entry in entries:
+                if cancelled.is_set():
+                    return
+                batch.append(entry)
+                if len(batch) >= self.BATCH_SIZE:
+                    GLib.idle_add(self._add_entries, cancelled, batch)
+                    batch = []
+        except Exception as edata:
+            GLib.idle_add(self._finished, cancelled, str(edata))
+            return
+        finally:
+            entries.close()
+        GLib.idle_add(self._add_entries, cancelled, batch)
+        GLib.idle_add(self._finished, cancelled, None)
+    def _add_entries(self, cancelled, entries):
+        if cancelled.is_set():
+            return False
+        model = self.list_view.get_model()
+        for entry in entries:
+            model.append_entry(entry)
+            if entry.rank == 1:
+                self._n_done += 1
+        self._update_state()
+        return False
+    def _finished(self, cancelled, error):
+        if cancelled.is_set():
+            return False
+        cancelled.set()
+        if error:
+            self._update_state(_("Failed: {0}").format(error))
+        else:
+            self._complete = True
+            self.list_view.sort_by_best_match()
+            self._update_state()
+        return False
+    def _response_cb(self, dialog, response):
+        was_running = self._running
+        if self._cancelled is not None:
+            self._cancelled.set()
+        if response == Gtk.ResponseType.CANCEL:
+            if was_running:
+                self._update_state(_("Cancelled after {0} of {1} standard colours").format(self._n_done, len(self._standard_items)))
+        else:
+            dialog.destroy()
+    def populate_action_groups(self):
+        self.action_groups[actions.AC_DONT_CARE].add_actions(
+            [
+                ("xref_add_standard_file", Gtk.STOCK_ADD, _("Add Standard"), None,
+                 _("Add the colours in a paint standard file to the cross reference."),
+                 lambda _action: self._add_collection_file(_("Paint Standard File:"), "*.pstddb", pfile.STANDARD_HEADER_KEYS, self._standard_labels, self._standard_items)
+                ),
+                ("xref_add_series_file", Gtk.STOCK_ADD, _("Add Series"), None,
+                 _("Add the paints in a paint series file to the cross reference."),
+                 lambda _action: self._add_collection_file(_("Paint Series File:"), "*.psd", pfile.SERIES_HEADER_KEYS, self._series_labels, self._series_items)
+                ),
+                ("xref_calculate", Gtk.STOCK_EXECUTE, _("Calculate"), None,
+                 _("Calculate the cross reference of the standards against the series."),
+                 lambda _action: self._start_calculation()
+                ),
+                ("xref_sort_by_best_match", Gtk.STOCK_SORT_ASCENDING, _("Best Match"), None,
+                 _("Sort the cross reference by ascending colour difference."),
+                 lambda _action: self.list_view.sort_by_best_match()
+                ),
+                ("xref_export_csv", Gtk.STOCK_SAVE_AS, _("Export"), None,
+                 _("Export the (completed) cross reference to a CSV file."),
+                 lambda _action: self._export_csv_acb()
+                ),
+            ])
+    def _export_csv_acb(self):
+        file_path = self._ask_file_path(_("Export File Path:"), Gtk.FileChooserAction.SAVE)
+        if not file_path:
+            return
+        try:
+            write_csv(file_path, self.list_view.get_model().iter_entries())
+        except (OSError, UnicodeError) as edata:
+            self._report_error(str(edata))
+            return
+        recollect.set("xref", "last_export_file", file_path)
@@ -0,0 +1,127 @@
+#  Copyright 2026 The mcmmtk contributors
+#
+# This software is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License only.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; if not, write to:
+#  The Free Software Foundation, Inc., 51 Franklin Street,
+#  Fifth Floor, Boston, MA 02110-1301 USA
+
+"""Tests for the streaming atomic writing of paint collection files"""
+
+import os
+import stat
+import tempfile
+import time
+import unittest
+
+from mcmmtk_pkg import mpaint
+from mcmmtk_pkg import pfile
+from mcmmtk_pkg.epaint.rgbh import RGB16
+
+N_PAINTS = 100000
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SHIPPED_FILES = [
+    (mpaint.ModelPaintSeries, os.path.join(BASE_DIR, "data", "ideal.psd")),
+    (mpaint.ModelPaintStandard, os.path.join(BASE_DIR, "standards", "bs381c.pstddb")),
+]
+
+HEADER_VALUES = ["Test Sponsor", "Test Standard"]
+
+def make_paints(n):
+    return [mpaint.ModelPaint("TS {0:06}".format(i), RGB16(red=i % 0x10000, green=(i * 7) % 0x10000, blue=(i * 13) % 0x10000), transparency="O", finish="F", metallic="NM", fluorescence="NF", notes="Colour {0}".format(i)) for i in range(n)]
+
+class DefinitionFileTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, "test.pstddb")
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    def read_text(self, file_path=None):
+        with open(file_path if file_path else self.file_path, encoding="utf-8") as fobj:
+            return fobj.read()
+    def assertSamePaints(self, paints, expected):
+        self.assertEqual([repr(paint) for paint in paints], [repr(paint) for paint in expected])
+    def test_round_trip_100k_paints(self):
+        paints = make_paints(N_PAINTS)
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, paints)
+        header_values, read_back = mpaint.ModelPaintStandard.read_definition_file(self.file_path)
+        self.assertEqual(header_values, HEADER_VALUES)
+        self.assertSamePaints(read_back, paints)
+    def test_round_trip_shipped_files(self):
+        for colln, file_path in SHIPPED_FILES:
+            header_values, paints = colln.read_definition_file(file_path)
+            colln.write_definition_file(self.file_path, header_values, paints)
+            shipped_lines = self.read_text(file_path).splitlines()
+            written_lines = self.read_text().splitlines()
+            self.assertEqual(written_lines[:len(colln.HEADER_KEYS)], shipped_lines[:len(colln.HEADER_KEYS)])
+            self.assertEqual(len(written_lines), len(shipped_lines))
+            re_header_values, re_paints = colln.read_definition_file(self.file_path)
+            self.assertEqual(re_header_values, header_values)
+            self.assertSamePaints(re_paints, paints)
+    def test_wrong_header_rejected(self):
+        _colln, file_path = SHIPPED_FILES[0]
+        with self.assertRaises(mpaint.ModelPaintStandard.ParseError):
+            mpaint.ModelPaintStandard.read_definition_file(file_path)
+    def test_throughput_100k_paints(self):
+        # Compare the streaming save with formatting the whole definition
+        # as one string (the old save path) rather than with a fixed time.
+        paints = make_paints(N_PAINTS)
+        baseline_path = os.path.join(self.tmp_dir.name, "baseline.pstddb")
+        start = time.perf_counter()
+        text = "".join(pfile.definition_lines(pfile.STANDARD_HEADER_KEYS, HEADER_VALUES, paints))
+        with open(baseline_path, "w", encoding="utf-8") as fobj:
+            fobj.write(text)
+        baseline = time.perf_counter() - start
+        start = time.perf_counter()
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, paints)
+        elapsed = time.perf_counter() - start
+        self.assertEqual(self.read_text(), self.read_text(baseline_path))
+        self.assertLess(elapsed, 2 * baseline)
+    def test_failure_leaves_original_intact(self):
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, make_paints(10))
+        original = self.read_text()
+        def failing_paints():
+            for paint in make_paints(1000):
+                yield paint
+            raise RuntimeError("crash part way through")
+        with self.assertRaises(RuntimeError):
+            mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, failing_paints())
+        self.assertEqual(self.read_text(), original)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["test.pstddb"])
+    def test_permissions_preserved(self):
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, [])
+        os.chmod(self.file_path, 0o640)
+        old_stat = os.stat(self.file_path)
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, make_paints(10))
+        new_stat = os.stat(self.file_path)
+        self.assertEqual(stat.S_IMODE(new_stat.st_mode), 0o640)
+        self.assertEqual((new_stat.st_uid, new_stat.st_gid), (old_stat.st_uid, old_stat.st_gid))
+    def test_new_file_honours_umask(self):
+        old_umask = os.umask(0o027)
+        try:
+            mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, [])
+        finally:
+            os.umask(old_umask)
+        self.assertEqual(stat.S_IMODE(os.stat(self.file_path).st_mode), 0o640)
+    @unittest.skipUnless(hasattr(os, "symlink"), "no symbolic links")
+    def test_symlink_target_replaced(self):
+        mpaint.ModelPaintStandard.write_definition_file(self.file_path, HEADER_VALUES, [])
+        link_path = os.path.join(self.tmp_dir.name, "link.pstddb")
+        os.symlink(self.file_path, link_path)
+        paints = make_paints(10)
+        mpaint.ModelPaintStandard.write_definition_file(link_path, HEADER_VALUES, paints)
+        self.assertTrue(os.path.islink(link_path))
+        self.assertSamePaints(mpaint.ModelPaintStandard.read_definition_file(self.file_path)[1], paints)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+#  Copyright 2026 The mcmmtk contributors
+#
+# This software is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License only.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; if not, write to:
+#  The Free Software Foundation, Inc., 51 Franklin Street,
+#  Fifth Floor, Boston, MA 02110-1301 USA
+
+"""Tests for cross referencing paint standards against paint series"""
+
+import math
+import os
+import random
+import unittest
+
+from mcmmtk_pkg import pfile
+from mcmmtk_pkg import xref
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def random_items(label, n, rng):
+    return [(label, "{0} {1}".format(label, i), tuple(rng.randrange(0x10000) for _ in range(3))) for i in range(n)]
+
+def brute_force(standard_items, series_items, k):
+    series_labs = [xref.rgb16_to_lab(rgb) for _colln, _name, rgb in series_items]
+    result = []
+    for standard, name, rgb in standard_items:
+        lab = xref.rgb16_to_lab(rgb)
+        distances = sorted((math.sqrt(sum((c1 - c2) ** 2 for c1, c2 in zip(lab, series_lab))), index) for index, series_lab in enumerate(series_labs))
+        for rank, (delta_e, index) in enumerate(distances[:k], 1):
+            result.append((standard, name, rank, series_items[index][0], series_items[index][1], delta_e))
+    return result
+
+class RGB16ToLabTests(unittest.TestCase):
+    def assertLabAlmostEqual(self, lab, expected):
+        for value, expected_value in zip(lab, expected):
+            self.assertAlmostEqual(value, expected_value, places=2)
+    def test_known_values(self):
+        self.assertLabAlmostEqual(xref.rgb16_to_lab((0, 0, 0)), (0.0, 0.0, 0.0))
+        self.assertLabAlmostEqual(xref.rgb16_to_lab((0xFFFF, 0xFFFF, 0xFFFF)), (100.0, 0.0, 0.0))
+        self.assertLabAlmostEqual(xref.rgb16_to_lab((0xFFFF, 0, 0)), (53.24, 80.09, 67.20))
+        self.assertLabAlmostEqual(xref.rgb16_to_lab((0, 0xFFFF, 0)), (87.73, -86.18, 83.18))
+        self.assertLabAlmostEqual(xref.rgb16_to_lab((0, 0, 0xFFFF)), (32.30, 79.19, -107.86))
+
+class CrossReferenceTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(381)
+        self.standard_items = random_items("Standard", 300, rng)
+        self.series_items = random_items("Series", 3000, rng)
+    def assertMatchesBruteForce(self, entries, standard_items, series_items, k):
+        expected = brute_force(standard_items, series_items, k)
+        self.assertEqual(len(entries), len(expected))
+        for entry, (standard, name, rank, series, series_paint, delta_e) in zip(entries, expected):
+            self.assertEqual((entry.standard, entry.standard_paint, entry.rank, entry.series, entry.series_paint), (standard, name, rank, series, series_paint))
+            self.assertAlmostEqual(entry.delta_e, delta_e, places=9)
+    def test_single_process_matches_brute_force(self):
+        entries = list(xref.cross_reference(self.standard_items, self.series_items, k=5, processes=1))
+        self.assertMatchesBruteForce(entries, self.standard_items, self.series_items, 5)
+    def test_process_pool_matches_brute_force(self):
+        entries = list(xref.cross_reference(self.standard_items, self.series_items, k=5, chunk_size=7, processes=4))
+        self.assertMatchesBruteForce(entries, self.standard_items, self.series_items, 5)
+    def test_k_larger_than_series(self):
+        series_items = self.series_items[:3]
+        entries = list(xref.cross_reference(self.standard_items[:10], series_items, k=5, processes=1))
+        self.assertMatchesBruteForce(entries, self.standard_items[:10], series_items, 3)
+    def test_no_series(self):
+        self.assertEqual(list(xref.cross_reference(self.standard_items, [], processes=1)), [])
+    def test_no_standards(self):
+        self.assertEqual(list(xref.cross_reference([], self.series_items, processes=1)), [])
+    def test_early_close(self):
+        for processes in (1, 2):
+            entries = xref.cross_reference(self.standard_items, self.series_items, k=2, processes=processes)
+            self.assertEqual(next(entries).rank, 1)
+            entries.close()
+
+class ReadCollectionTests(unittest.TestCase):
+    def test_shipped_files(self):
+        label, items = xref.read_collection(os.path.join(BASE_DIR, "standards", "bs381c.pstddb"), pfile.STANDARD_HEADER_KEYS)
+        self.assertEqual(label, "UK Government British Standard 381C (www.britishstandardcolour.com)")
+        self.assertEqual(len(items), 119)
+        self.assertEqual(items[0], (label, "BS381C 101", (0x9400, 0xBF00, 0xAC00)))
+        label, items = xref.read_collection(os.path.join(BASE_DIR, "data", "ideal.psd"), pfile.SERIES_HEADER_KEYS)
+        self.assertEqual(label, "Imaginary Ideal Paint Colours Series")
+        self.assertIn((label, "Blue", (0, 0, 0xFFFF)), items)
+
+if __name__ == "__main__":
+    unittest.main()